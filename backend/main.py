@@ -1,22 +1,33 @@
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import asyncio
+import os
+import pickle
+import sys
+import time as time_module
 import websockets
 import json
-import requests
+import orjson
+import httpx
+import numpy as np
 import pandas as pd
+from cachetools import LRUCache, TTLCache
+from dataclasses import dataclass
 from datetime import datetime, time
 import logging
 from enum import Enum
-import uuid
+import secrets
+import struct
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Trading Bot Backend", version="1.0.0")
+app = FastAPI(title="Trading Bot Backend", version="1.0.0",
+              default_response_class=ORJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -33,9 +44,12 @@ class Config:
     WEBSOCKET_URL = "wss://smartapisocket.angelone.in/smart-stream"
     ORDER_WEBSOCKET_URL = "wss://tns.angelone.in/smart-order-update"
     SCRIP_MASTER_URL = "https://margincalculator.angelone.in/OpenAPI_File/files/OpenAPIScripMaster.json"
+    SCRIP_MASTER_CACHE = os.path.join(os.path.dirname(__file__), "scrip_master.cache")
     ORDER_TIMEOUT_MINUTES = 5
     AUTO_EXIT_TIME = time(15, 25)  # 3:25 PM
     MAX_TRAILING_POINTS = 4
+    FEED_STALE_SECONDS = 30
+    FEED_RECONNECT_MAX_BACKOFF = 30.0
 
 # Enums
 class OrderType(str, Enum):
@@ -94,56 +108,294 @@ class TradePosition(BaseModel):
     pnl: float
     timestamp: datetime
 
+# Integer type codes for the trigger arrays
+TRIGGER_BUY = 0
+TRIGGER_SELL = 1
+
+@dataclass(slots=True)
+class Trigger:
+    """An active buy/sell trigger.
+
+    Slots keep the per-trigger footprint small and make the hot-path
+    attribute reads C-level slot loads instead of dict lookups.
+    """
+    trigger_id: str
+    type: str  # "buy_trigger" | "sell_trigger"
+    symbol: str
+    exchange: str
+    symbol_token: str
+    created_at: float
+    quantity: int = 0
+    order_type: Optional[OrderType] = None
+    sell_type: Optional[SellOrderType] = None
+    trade_mode: Optional[TradeMode] = None
+    points: Optional[float] = None
+    percentage: Optional[float] = None
+    candle_size: Optional[str] = None
+    target_multiplier: Optional[float] = None
+    trailing_points: Optional[float] = None
+    initial_price: float = 0.0
+    target_price: Optional[float] = None
+    status: str = "active"
+
+try:
+    from numba import njit, prange
+
+    @njit(parallel=True, cache=True)
+    def _eval_triggers(ltps, targets, types, statuses):
+        """Native kernel over the trigger columns; returns the fired mask"""
+        n = len(targets)
+        out = np.empty(n, dtype=np.bool_)
+        for i in prange(n):
+            out[i] = (statuses[i] == 1 and ltps[i] > 0 and targets[i] >= 0 and
+                      ((types[i] == TRIGGER_BUY and ltps[i] >= targets[i]) or
+                       (types[i] == TRIGGER_SELL and ltps[i] <= targets[i])))
+        return out
+
+except ImportError:
+    # Numba is optional; the NumPy expression below evaluates the same
+    # mask in C, just with a few intermediate arrays.
+    def _eval_triggers(ltps, targets, types, statuses):
+        active = (statuses == 1) & (ltps > 0) & (targets >= 0)
+        return active & (
+            ((types == TRIGGER_BUY) & (ltps >= targets)) |
+            ((types == TRIGGER_SELL) & (ltps <= targets))
+        )
+
+class TriggerArrays:
+    """Structure-of-arrays mirror of the hot trigger columns.
+
+    The full trigger records stay in active_orders; these parallel arrays
+    hold just the columns the monitor compares every tick, so trigger
+    evaluation is a handful of vectorized NumPy ops instead of per-trigger
+    dict lookups. Rows are kept dense via swap-remove.
+    """
+
+    _ARRAY_COLUMNS = ("types", "target_paise", "statuses")
+
+    # Listener sets at least this large are evaluated by the compiled
+    # kernel; below it the plain Python loop wins (no gather, no
+    # per-call array allocation)
+    _KERNEL_MIN_LISTENERS = 64
+
+    def __init__(self, capacity: int = 64):
+        self.index = {}     # trigger_id -> row
+        self.ids = []       # row -> trigger_id
+        self.tokens = []    # row -> symbol_token
+        self.by_token = {}  # symbol_token -> set of trigger_ids
+        self.types = np.zeros(capacity, dtype=np.int8)
+        # Price levels in integer paise (tick size is 0.05 INR, so x100 is
+        # exact); int32 halves the column width vs float64 and sidesteps
+        # float comparisons at tick boundaries. -1 means "no level yet".
+        self.target_paise = np.full(capacity, -1, dtype=np.int32)
+        self.statuses = np.zeros(capacity, dtype=np.int8)
+        self.size = 0
+
+    def _grow(self):
+        capacity = max(64, 2 * len(self.types))
+        for name in self._ARRAY_COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def add(self, trigger_id: str, trigger_type: int, symbol_token: str,
+            target_price: Optional[float]):
+        if self.size == len(self.types):
+            self._grow()
+        row = self.size
+        self.index[trigger_id] = row
+        self.ids.append(trigger_id)
+        self.tokens.append(symbol_token)
+        self.types[row] = trigger_type
+        # -1 marks "no level yet" (candle triggers, unfilled stops) and
+        # never fires against a real price
+        self.target_paise[row] = -1 if target_price is None else int(round(target_price * 100))
+        self.statuses[row] = 1
+        self.by_token.setdefault(symbol_token, set()).add(trigger_id)
+        self.size += 1
+
+    def set_target(self, trigger_id: str, target_price: float):
+        row = self.index.get(trigger_id)
+        if row is not None:
+            self.target_paise[row] = int(round(target_price * 100))
+
+    def remove(self, trigger_id: str):
+        """Swap the last row into the removed slot so the arrays stay dense"""
+        row = self.index.pop(trigger_id, None)
+        if row is None:
+            return
+        listeners = self.by_token.get(self.tokens[row])
+        if listeners:
+            listeners.discard(trigger_id)
+            if not listeners:
+                del self.by_token[self.tokens[row]]
+        last = self.size - 1
+        if row != last:
+            moved_id = self.ids[last]
+            self.ids[row] = moved_id
+            self.tokens[row] = self.tokens[last]
+            self.types[row] = self.types[last]
+            self.target_paise[row] = self.target_paise[last]
+            self.statuses[row] = self.statuses[last]
+            self.index[moved_id] = row
+        self.ids.pop()
+        self.tokens.pop()
+        self.size = last
+
+    def clear(self):
+        self.index.clear()
+        self.ids.clear()
+        self.tokens.clear()
+        self.by_token.clear()
+        self.statuses[:self.size] = 0
+        self.size = 0
+
+    def fired_ids_for_token(self, symbol_token: str, ltp_paise: int) -> List[str]:
+        """Evaluate only the triggers listening on one token"""
+        listeners = self.by_token.get(symbol_token)
+        if not listeners or ltp_paise <= 0:
+            return []
+        # Bind columns locally - attribute lookups add up per tick
+        index = self.index
+        if len(listeners) >= self._KERNEL_MIN_LISTENERS:
+            # Hot token: gather the listener rows and hand them to the
+            # vectorized kernel in one pass
+            rows = np.fromiter((index[trigger_id] for trigger_id in listeners),
+                               dtype=np.intp, count=len(listeners))
+            ltps = np.full(len(rows), ltp_paise, dtype=np.int32)
+            fired = _eval_triggers(ltps, self.target_paise[rows],
+                                   self.types[rows], self.statuses[rows])
+            ids = self.ids
+            return [ids[row] for row in rows[fired]]
+        types = self.types
+        targets = self.target_paise
+        statuses = self.statuses
+        fired = []
+        for trigger_id in listeners:
+            row = index[trigger_id]
+            if statuses[row] != 1:
+                continue
+            target = targets[row]
+            if target < 0:  # no level set yet
+                continue
+            if (types[row] == TRIGGER_BUY and ltp_paise >= target) or \
+               (types[row] == TRIGGER_SELL and ltp_paise <= target):
+                fired.append(trigger_id)
+        return fired
+
 # Global state management
 class TradingBotState:
     def __init__(self):
         self.authenticated = False
         self.jwt_token = None
         self.feed_token = None
+        self.auth_headers = None
         self.scrip_master = {}
         self.active_positions = {}
         self.active_orders = {}
-        self.websocket_connections = []
-        self.price_data = {}
-        self.candle_data = {}
+        self.trigger_arrays = TriggerArrays()
+        self.websocket_connections = set()
+        # Bounded stores - a long-running bot accumulates a key per
+        # subscribed token/candle query forever otherwise. Stale ticks
+        # age out of price_data after an hour.
+        self.price_data = TTLCache(maxsize=10_000, ttl=3600)
+        self.candle_data = LRUCache(maxsize=1000)
         self.trailing_stops = {}
         self.bot_active = True
+        self.tick_queue = asyncio.Queue()
+        # Pub-sub plumbing for market data clients: one encoded snapshot
+        # shared by every subscriber, refreshed only when prices move
+        self.price_condition = asyncio.Condition()
+        self.price_dirty = asyncio.Event()
+        self.price_payload = None
 
 bot_state = TradingBotState()
 
+# Shared async HTTP client - created on startup, closed on shutdown.
+# Keeps the event loop free while waiting on broker API calls.
+http_client: Optional[httpx.AsyncClient] = None
+
 # Utility Functions
 def get_headers():
-    """Get standard headers for API requests"""
+    """Get standard headers for API requests (cached - rebuilt only on login)"""
     if not bot_state.authenticated:
         raise HTTPException(status_code=401, detail="Not authenticated")
-    
-    return {
-        "Authorization": f"Bearer {bot_state.jwt_token}",
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-        "X-UserType": "USER",
-        "X-SourceID": "WEB"
-    }
+
+    return bot_state.auth_headers
+
+def _read_scrip_cache():
+    """Read (etag, symbol->token dict) from the on-disk cache, if present"""
+    try:
+        with open(Config.SCRIP_MASTER_CACHE, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError):
+        return None, None
+
+def _write_scrip_cache(etag: str, scrip_master: dict):
+    """Persist the parsed scrip master keyed by its HTTP ETag"""
+    try:
+        with open(Config.SCRIP_MASTER_CACHE, "wb") as f:
+            pickle.dump((etag, scrip_master), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        logger.warning(f"Could not write scrip master cache: {e}")
 
 async def load_scrip_master():
     """Load instrument master data"""
     try:
-        response = requests.get(Config.SCRIP_MASTER_URL)
-        if response.status_code == 200:
-            data = response.json()
-            for instrument in data:
-                symbol_key = f"{instrument['tradingsymbol']}-{instrument['exchange']}"
-                bot_state.scrip_master[symbol_key] = instrument
-            logger.info(f"Loaded {len(bot_state.scrip_master)} instruments")
+        cached_etag, cached_map = _read_scrip_cache()
+        headers = {"Accept-Encoding": "gzip"}
+        if cached_etag:
+            headers["If-None-Match"] = cached_etag
+
+        # Stream the ~50MB payload so the raw bytes are released as soon
+        # as they are parsed, rather than kept alive on the response.
+        async with http_client.stream("GET", Config.SCRIP_MASTER_URL, headers=headers) as response:
+            if response.status_code == 304 and cached_map is not None:
+                bot_state.scrip_master = cached_map
+                logger.info(f"Scrip master unchanged, loaded {len(cached_map)} instruments from cache")
+                return
+            if response.status_code != 200:
+                return
+            raw = await response.aread()
+
+        data = orjson.loads(raw)
+        del raw
+        # Keep only the symbol -> token mapping; the full instrument
+        # dicts are never read downstream. Interned keys share storage
+        # with the lookup keys built in get_symbol_token.
+        bot_state.scrip_master = {
+            sys.intern(f"{i['tradingsymbol']}-{i['exchange']}"): i["symboltoken"]
+            for i in data
+        }
+        logger.info(f"Loaded {len(bot_state.scrip_master)} instruments")
+
+        etag = response.headers.get("etag")
+        if etag:
+            _write_scrip_cache(etag, bot_state.scrip_master)
     except Exception as e:
         logger.error(f"Error loading scrip master: {e}")
 
 def get_symbol_token(symbol: str, exchange: str) -> str:
     """Get token for a symbol"""
-    key = f"{symbol}-{exchange}"
-    if key not in bot_state.scrip_master:
-        raise HTTPException(status_code=404, detail=f"Symbol {key} not found")
-    return bot_state.scrip_master[key]["symboltoken"]
+    token = bot_state.scrip_master.get(f"{symbol}-{exchange}")
+    if token is None:
+        raise HTTPException(status_code=404, detail=f"Symbol {symbol}-{exchange} not found")
+    return token
+
+def on_price_tick(symbol_token: str, ltp: float):
+    """Record a price tick and wake the trigger monitor for this token"""
+    on_price_tick_paise(symbol_token, int(round(ltp * 100)))
+
+def on_price_tick_paise(symbol_token: str, ltp_paise: int):
+    """Record a tick already expressed in integer paise (binary feed path)"""
+    price_info = bot_state.price_data.get(symbol_token)
+    if price_info is None:
+        price_info = bot_state.price_data[symbol_token] = {}
+    price_info["ltp"] = ltp_paise / 100
+    price_info["ltp_i"] = ltp_paise
+    bot_state.tick_queue.put_nowait((symbol_token, ltp_paise))
+    bot_state.price_dirty.set()
 
 def calculate_pnl(entry_price: float, current_price: float, quantity: int, transaction_type: str) -> float:
     """Calculate P&L for a position"""
@@ -176,8 +428,8 @@ async def login(auth_request: AuthRequest):
         if auth_request.totp:
             payload["totp"] = auth_request.totp
         
-        response = requests.post(
-            f"{Config.ANGEL_API_BASE}/auth/angelbroking/user/v1/loginByPassword",
+        response = await http_client.post(
+            "/auth/angelbroking/user/v1/loginByPassword",
             headers=headers,
             json=payload
         )
@@ -188,10 +440,20 @@ async def login(auth_request: AuthRequest):
                 bot_state.authenticated = True
                 bot_state.jwt_token = data["data"]["jwtToken"]
                 bot_state.feed_token = data["data"]["feedToken"]
-                
-                # Load scrip master after authentication
-                await load_scrip_master()
-                
+
+                # Build the request headers once - the token only changes on re-auth
+                bot_state.auth_headers = {
+                    "Authorization": f"Bearer {bot_state.jwt_token}",
+                    "Content-Type": "application/json",
+                    "Accept": "application/json",
+                    "X-UserType": "USER",
+                    "X-SourceID": "WEB"
+                }
+
+                # Load scrip master in the background - the ~50MB download
+                # should not hold up the login response by several seconds
+                asyncio.create_task(load_scrip_master())
+
                 return {"status": "success", "message": "Authentication successful"}
             else:
                 raise HTTPException(status_code=401, detail=data.get("message", "Authentication failed"))
@@ -220,25 +482,36 @@ async def place_buy_order(order_request: BuyOrderRequest):
             )
         else:
             # Set up trigger monitoring
-            trigger_id = str(uuid.uuid4())
-            bot_state.active_orders[trigger_id] = {
-                "type": "buy_trigger",
-                "symbol": order_request.symbol,
-                "exchange": order_request.exchange,
-                "symbol_token": symbol_token,
-                "quantity": order_request.quantity,
-                "order_type": order_request.order_type,
-                "trade_mode": order_request.trade_mode,
-                "points": order_request.points,
-                "percentage": order_request.percentage,
-                "candle_size": order_request.candle_size,
-                "target_multiplier": order_request.target_multiplier,
-                "trailing_points": order_request.trailing_points,
-                "initial_price": bot_state.price_data.get(symbol_token, {}).get("ltp", 0),
-                "created_at": datetime.now(),
-                "status": "active"
-            }
-            
+            trigger_id = secrets.token_hex(8)
+            initial_price = bot_state.price_data.get(symbol_token, {}).get("ltp", 0)
+
+            # Fix the target level once here so the monitor loop only compares
+            target_price = None
+            if order_request.order_type == OrderType.POINTS_TRIGGER:
+                target_price = initial_price + order_request.points
+            elif order_request.order_type == OrderType.PERCENTAGE_TRIGGER:
+                target_price = initial_price * (1 + order_request.percentage / 100)
+
+            bot_state.active_orders[trigger_id] = Trigger(
+                trigger_id=trigger_id,
+                type="buy_trigger",
+                symbol=order_request.symbol,
+                exchange=order_request.exchange,
+                symbol_token=symbol_token,
+                quantity=order_request.quantity,
+                order_type=order_request.order_type,
+                trade_mode=order_request.trade_mode,
+                points=order_request.points,
+                percentage=order_request.percentage,
+                candle_size=order_request.candle_size,
+                target_multiplier=order_request.target_multiplier,
+                trailing_points=order_request.trailing_points,
+                initial_price=initial_price,
+                target_price=target_price,
+                created_at=time_module.monotonic()
+            )
+            bot_state.trigger_arrays.add(trigger_id, TRIGGER_BUY, symbol_token, target_price)
+
             return {
                 "status": "success",
                 "trigger_id": trigger_id,
@@ -265,24 +538,42 @@ async def place_sell_order(sell_request: SellOrderRequest):
             )
         else:
             # Set up stop loss conditions
-            trigger_id = str(uuid.uuid4())
+            trigger_id = secrets.token_hex(8)
             symbol_token = get_symbol_token(sell_request.symbol, sell_request.exchange)
-            
-            bot_state.active_orders[trigger_id] = {
-                "type": "sell_trigger", 
-                "symbol": sell_request.symbol,
-                "exchange": sell_request.exchange,
-                "symbol_token": symbol_token,
-                "sell_type": sell_request.sell_type,
-                "points": sell_request.points,
-                "percentage": sell_request.percentage,
-                "candle_size": sell_request.candle_size,
-                "target_multiplier": sell_request.target_multiplier,
-                "trailing_points": sell_request.trailing_points,
-                "created_at": datetime.now(),
-                "status": "active"
-            }
-            
+
+            # Resolve the entry price now so the stop level is fixed at
+            # creation; stays None if the position has not filled yet.
+            entry_price = 0
+            positions = await get_positions()
+            for pos in positions.get("data", []):
+                if pos["symboltoken"] == symbol_token:
+                    entry_price = float(pos["avgprice"])
+                    break
+
+            target_price = None
+            if entry_price:
+                if sell_request.sell_type == SellOrderType.POINTS_STOP:
+                    target_price = entry_price - sell_request.points
+                elif sell_request.sell_type == SellOrderType.PERCENTAGE_STOP:
+                    target_price = entry_price * (1 - sell_request.percentage / 100)
+
+            bot_state.active_orders[trigger_id] = Trigger(
+                trigger_id=trigger_id,
+                type="sell_trigger",
+                symbol=sell_request.symbol,
+                exchange=sell_request.exchange,
+                symbol_token=symbol_token,
+                sell_type=sell_request.sell_type,
+                points=sell_request.points,
+                percentage=sell_request.percentage,
+                candle_size=sell_request.candle_size,
+                target_multiplier=sell_request.target_multiplier,
+                trailing_points=sell_request.trailing_points,
+                target_price=target_price,
+                created_at=time_module.monotonic()
+            )
+            bot_state.trigger_arrays.add(trigger_id, TRIGGER_SELL, symbol_token, target_price)
+
             return {
                 "status": "success",
                 "trigger_id": trigger_id,
@@ -322,8 +613,8 @@ async def execute_market_order(symbol: str, exchange: str, symbol_token: str,
             "triggerprice": "0"
         }
         
-        response = requests.post(
-            f"{Config.ANGEL_API_BASE}/secure/angelbroking/order/v1/placeOrder",
+        response = await http_client.post(
+            "/secure/angelbroking/order/v1/placeOrder",
             headers=get_headers(),
             json=payload
         )
@@ -331,6 +622,7 @@ async def execute_market_order(symbol: str, exchange: str, symbol_token: str,
         if response.status_code == 200:
             data = response.json()
             if data.get("status"):
+                invalidate_positions_cache()
                 return {
                     "status": "success",
                     "order_id": data["data"]["orderid"],
@@ -346,30 +638,50 @@ async def execute_market_order(symbol: str, exchange: str, symbol_token: str,
         raise HTTPException(status_code=500, detail=str(e))
 
 # Position and Data Endpoints
+POSITIONS_CACHE_TTL = 1.0
+_positions_cache = None
+_positions_cache_ts = 0.0
+
 @app.get("/positions")
 async def get_positions():
-    """Get current positions"""
+    """Get current positions (served from a short TTL cache)"""
+    global _positions_cache, _positions_cache_ts
+
+    # Positions only change when an order fills; collapse the bursts of
+    # duplicate fetches from the monitors and order paths within one tick.
+    if _positions_cache is not None and \
+            time_module.monotonic() - _positions_cache_ts < POSITIONS_CACHE_TTL:
+        return _positions_cache
+
     try:
-        response = requests.get(
-            f"{Config.ANGEL_API_BASE}/secure/angelbroking/order/v1/getPosition",
+        response = await http_client.get(
+            "/secure/angelbroking/order/v1/getPosition",
             headers=get_headers()
         )
-        
+
         if response.status_code == 200:
-            return response.json()
+            data = response.json()
+            _positions_cache = data
+            _positions_cache_ts = time_module.monotonic()
+            return data
         else:
             raise HTTPException(status_code=response.status_code, detail="Failed to get positions")
-            
+
     except Exception as e:
         logger.error(f"Get positions error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def invalidate_positions_cache():
+    """Force the next get_positions() to hit the broker (after a fill)"""
+    global _positions_cache_ts
+    _positions_cache_ts = 0.0
+
 @app.get("/orders")
 async def get_order_book():
     """Get order book"""
     try:
-        response = requests.get(
-            f"{Config.ANGEL_API_BASE}/secure/angelbroking/order/v1/getOrderBook",
+        response = await http_client.get(
+            "/secure/angelbroking/order/v1/getOrderBook",
             headers=get_headers()
         )
         
@@ -386,8 +698,8 @@ async def get_order_book():
 async def get_trade_book():
     """Get trade book for PnL calculation"""
     try:
-        response = requests.get(
-            f"{Config.ANGEL_API_BASE}/secure/angelbroking/order/v1/getTradeBook",
+        response = await http_client.get(
+            "/secure/angelbroking/order/v1/getTradeBook",
             headers=get_headers()
         )
         
@@ -404,8 +716,8 @@ async def get_trade_book():
 async def get_margin():
     """Get RMS/Margin details"""
     try:
-        response = requests.get(
-            f"{Config.ANGEL_API_BASE}/secure/angelbroking/user/v1/getRMS",
+        response = await http_client.get(
+            "/secure/angelbroking/user/v1/getRMS",
             headers=get_headers()
         )
         
@@ -433,8 +745,8 @@ async def get_candle_data(symbol: str, exchange: str = "NSE", interval: str = "O
             "todate": todate or datetime.now().strftime("%Y-%m-%d 15:30")
         }
         
-        response = requests.post(
-            f"{Config.ANGEL_API_BASE}/secure/angelbroking/historical/v1/getCandleData",
+        response = await http_client.post(
+            "/secure/angelbroking/historical/v1/getCandleData",
             headers=get_headers(),
             json=payload
         )
@@ -461,6 +773,7 @@ async def stop_bot():
     bot_state.bot_active = False
     # Cancel all active triggers
     bot_state.active_orders.clear()
+    bot_state.trigger_arrays.clear()
     return {"status": "success", "message": "Bot stopped"}
 
 @app.get("/bot/status")
@@ -471,6 +784,7 @@ async def get_bot_status():
         "authenticated": bot_state.authenticated,
         "active_triggers": len(bot_state.active_orders),
         "active_positions": len(bot_state.active_positions),
+        "websocket_clients": len(bot_state.websocket_connections),
         "triggers": list(bot_state.active_orders.keys())
     }
 
@@ -479,6 +793,7 @@ async def cancel_trigger(trigger_id: str):
     """Cancel a specific trigger"""
     if trigger_id in bot_state.active_orders:
         del bot_state.active_orders[trigger_id]
+        bot_state.trigger_arrays.remove(trigger_id)
         return {"status": "success", "message": f"Trigger {trigger_id} cancelled"}
     else:
         raise HTTPException(status_code=404, detail="Trigger not found")
@@ -488,197 +803,305 @@ async def cancel_trigger(trigger_id: str):
 async def websocket_market_data(websocket: WebSocket):
     """WebSocket for real-time market data"""
     await websocket.accept()
-    bot_state.websocket_connections.append(websocket)
-    
+    bot_state.websocket_connections.add(websocket)
+
+    condition = bot_state.price_condition
     try:
         while True:
-            # Send current price data to client
-            await websocket.send_json({
+            # Sleep until the broadcaster publishes a fresh snapshot -
+            # no polling, no wakeups while prices are static
+            async with condition:
+                await condition.wait()
+                payload = bot_state.price_payload
+            if payload:
+                await websocket.send_bytes(payload)
+
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        bot_state.websocket_connections.discard(websocket)
+
+async def market_data_broadcaster():
+    """Encode one shared price snapshot when prices move and wake subscribers"""
+    while True:
+        try:
+            await bot_state.price_dirty.wait()
+            bot_state.price_dirty.clear()
+
+            # Encode once per tick; every subscriber sends the same bytes
+            # (dict() because orjson does not serialize TTLCache directly)
+            bot_state.price_payload = orjson.dumps({
                 "type": "price_update",
-                "data": bot_state.price_data
+                "data": dict(bot_state.price_data)
             })
-            await asyncio.sleep(1)
-            
-    except WebSocketDisconnect:
-        bot_state.websocket_connections.remove(websocket)
+            async with bot_state.price_condition:
+                bot_state.price_condition.notify_all()
+        except Exception as e:
+            logger.error(f"Market data broadcast error: {e}")
+        # Pace snapshots at one per second even under heavy tick flow
+        await asyncio.sleep(1)
 
 # Background Tasks
 @app.on_event("startup")
 async def startup_event():
-    """Start background monitoring tasks"""
+    """Create HTTP client and start background monitoring tasks"""
+    global http_client
+    http_client = httpx.AsyncClient(
+        base_url=Config.ANGEL_API_BASE,
+        http2=True,
+        timeout=5.0,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+    )
     asyncio.create_task(price_monitor())
-    asyncio.create_task(trigger_monitor()) 
+    asyncio.create_task(trigger_monitor())
+    asyncio.create_task(trigger_expiry_monitor())
     asyncio.create_task(auto_exit_monitor())
+    asyncio.create_task(market_data_broadcaster())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close the shared HTTP client"""
+    if http_client:
+        await http_client.aclose()
+
+# smart-stream LTP packet (mode 1), little-endian: subscription mode,
+# exchange type, token (null-padded), sequence number, exchange timestamp,
+# last traded price in paise
+LTP_FRAME = struct.Struct("<BB25sqqq")
+
+def handle_feed_message(message):
+    """Dispatch a feed message into price state and the tick queue"""
+    try:
+        if isinstance(message, (bytes, bytearray)):
+            # Binary tick frame - one precompiled unpack, no UTF-8 decode
+            # or dict allocation per tick
+            if len(message) < LTP_FRAME.size:
+                return  # heartbeat / unsupported frame
+            _, _, raw_token, _, _, ltp_paise = LTP_FRAME.unpack_from(message)
+            on_price_tick_paise(raw_token.rstrip(b"\x00").decode(), ltp_paise)
+            return
+        data = json.loads(message)
+        token = data.get("token")
+        ltp = data.get("ltp")
+        if token and ltp is not None:
+            on_price_tick(token, float(ltp))
+    except Exception as e:
+        logger.error(f"Feed message error: {e}")
+
+async def subscribe_feed(websocket):
+    """Subscribe the single persistent connection to all tracked tokens"""
+    tokens = list(bot_state.trigger_arrays.by_token)
+    if not tokens:
+        return
+    await websocket.send(json.dumps({
+        "correlationID": "tradingbot",
+        "action": 1,
+        "params": {
+            "mode": 1,
+            "tokenList": [{"exchangeType": 1, "tokens": tokens}]
+        }
+    }))
 
 async def price_monitor():
-    """Monitor real-time price data via WebSocket"""
+    """Maintain the market data WebSocket with heartbeat and reconnect"""
+    backoff = 0.5
     while True:
+        if not (bot_state.authenticated and bot_state.feed_token):
+            await asyncio.sleep(5)
+            continue
+
         try:
-            if bot_state.authenticated and bot_state.feed_token:
-                # WebSocket connection logic would go here
-                # This is a placeholder for the actual WebSocket implementation
-                await asyncio.sleep(1)
-            else:
-                await asyncio.sleep(5)
+            async with websockets.connect(
+                Config.WEBSOCKET_URL,
+                ping_interval=20,
+                ping_timeout=10,
+                extra_headers={
+                    "Authorization": f"Bearer {bot_state.jwt_token}",
+                    "x-feed-token": bot_state.feed_token
+                }
+            ) as websocket:
+                logger.info("Market data WebSocket connected")
+                backoff = 0.5
+                last_tick = time_module.monotonic()
+                await subscribe_feed(websocket)
+
+                async def watchdog():
+                    # The TCP socket can stay "alive" while tick data silently
+                    # stops flowing; force a reconnect when the feed goes quiet.
+                    while True:
+                        await asyncio.sleep(5)
+                        if time_module.monotonic() - last_tick > Config.FEED_STALE_SECONDS:
+                            logger.warning("Market data feed stale - forcing reconnect")
+                            await websocket.close()
+                            return
+
+                watchdog_task = asyncio.create_task(watchdog())
+                try:
+                    async for message in websocket:
+                        last_tick = time_module.monotonic()
+                        handle_feed_message(message)
+                finally:
+                    watchdog_task.cancel()
+
         except Exception as e:
             logger.error(f"Price monitor error: {e}")
-            await asyncio.sleep(5)
+
+        logger.info(f"Reconnecting market data WebSocket in {backoff:.1f}s")
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, Config.FEED_RECONNECT_MAX_BACKOFF)
 
 async def trigger_monitor():
-    """Monitor and execute trigger conditions"""
+    """Execute trigger conditions as price ticks arrive (event-driven)"""
+    # These objects are stable for the process lifetime; binding them
+    # locally keeps attribute lookups out of the per-tick path
+    tick_queue = bot_state.tick_queue
+    trigger_arrays = bot_state.trigger_arrays
+    active_orders = bot_state.active_orders
+    fired_ids_for_token = trigger_arrays.fired_ids_for_token
+    single = TradeMode.SINGLE
+
     while True:
         try:
+            symbol_token, ltp_paise = await tick_queue.get()
+
             if not bot_state.bot_active:
-                await asyncio.sleep(1)
                 continue
-                
-            current_time = datetime.now()
-            triggers_to_remove = []
-            
-            for trigger_id, trigger in bot_state.active_orders.items():
-                if trigger["status"] != "active":
-                    continue
-                    
-                # Check for order timeout
-                if (current_time - trigger["created_at"]).total_seconds() > Config.ORDER_TIMEOUT_MINUTES * 60:
-                    triggers_to_remove.append(trigger_id)
-                    continue
-                
-                symbol_token = trigger["symbol_token"]
-                current_price = bot_state.price_data.get(symbol_token, {}).get("ltp", 0)
-                
-                if current_price == 0:
+
+            # Only the triggers listening on this token are evaluated
+            for trigger_id in fired_ids_for_token(symbol_token, ltp_paise):
+                trigger = active_orders.get(trigger_id)
+                if trigger is None:
                     continue
-                
-                # Check trigger conditions
-                if trigger["type"] == "buy_trigger":
-                    if await check_buy_trigger(trigger, current_price):
-                        await execute_trigger(trigger_id, trigger)
-                        if trigger["trade_mode"] == TradeMode.SINGLE:
-                            triggers_to_remove.append(trigger_id)
-                            
-                elif trigger["type"] == "sell_trigger":
-                    if await check_sell_trigger(trigger, current_price):
-                        await execute_trigger(trigger_id, trigger)
-                        triggers_to_remove.append(trigger_id)
-            
-            # Remove completed/expired triggers
-            for trigger_id in triggers_to_remove:
-                if trigger_id in bot_state.active_orders:
-                    del bot_state.active_orders[trigger_id]
-                    
+
+                await execute_trigger(trigger_id, trigger)
+                if trigger.type == "sell_trigger" or trigger.trade_mode == single:
+                    active_orders.pop(trigger_id, None)
+                    trigger_arrays.remove(trigger_id)
+
         except Exception as e:
             logger.error(f"Trigger monitor error: {e}")
-            
+
+async def trigger_expiry_monitor():
+    """Periodic sweep for trigger timeouts and stops awaiting a fill"""
+    timeout_seconds = Config.ORDER_TIMEOUT_MINUTES * 60
+    while True:
+        try:
+            if not bot_state.bot_active:
+                await asyncio.sleep(1)
+                continue
+
+            # Fetch positions at most once per sweep, and only if some sell
+            # trigger is still waiting on a fill to fix its stop level.
+            if any(t.type == "sell_trigger" and t.target_price is None
+                   for t in bot_state.active_orders.values()):
+                positions = await get_positions()
+                entry_by_token = {
+                    pos["symboltoken"]: float(pos["avgprice"])
+                    for pos in positions.get("data", [])
+                }
+                resolve_pending_stops(entry_by_token)
+
+            # Expire timed-out triggers (created_at is a monotonic float,
+            # so this is a plain subtract - no timedelta objects)
+            now = time_module.monotonic()
+            expired = [
+                trigger_id for trigger_id, trigger in bot_state.active_orders.items()
+                if now - trigger.created_at > timeout_seconds
+                or trigger.status != "active"
+            ]
+            for trigger_id in expired:
+                bot_state.active_orders.pop(trigger_id, None)
+                bot_state.trigger_arrays.remove(trigger_id)
+
+        except Exception as e:
+            logger.error(f"Trigger expiry monitor error: {e}")
+
         await asyncio.sleep(1)
 
-async def check_buy_trigger(trigger: dict, current_price: float) -> bool:
-    """Check if buy trigger conditions are met"""
-    try:
-        order_type = trigger["order_type"]
-        initial_price = trigger["initial_price"]
-        
-        if order_type == OrderType.POINTS_TRIGGER:
-            target_price = initial_price + trigger["points"]
-            return current_price >= target_price
-            
-        elif order_type == OrderType.PERCENTAGE_TRIGGER:
-            target_price = initial_price * (1 + trigger["percentage"] / 100)
-            return current_price >= target_price
-            
-        elif order_type == OrderType.CANDLE_TRIGGER:
-            # Candle analysis logic would go here
-            # This is a simplified version
-            return False  # Placeholder
-            
-    except Exception as e:
-        logger.error(f"Buy trigger check error: {e}")
-        return False
+def resolve_pending_stops(entry_by_token: Dict[str, float]):
+    """Fix stop levels for sell triggers created before their position filled"""
+    for trigger_id, trigger in bot_state.active_orders.items():
+        if trigger.type != "sell_trigger" or trigger.target_price is not None:
+            continue
 
-async def check_sell_trigger(trigger: dict, current_price: float) -> bool:
-    """Check if sell trigger conditions are met"""
-    try:
-        sell_type = trigger["sell_type"]
-        
-        # Get entry price from positions
-        positions = await get_positions()
-        entry_price = 0
-        for pos in positions.get("data", []):
-            if pos["symboltoken"] == trigger["symbol_token"]:
-                entry_price = float(pos["avgprice"])
-                break
-                
+        entry_price = entry_by_token.get(trigger.symbol_token, 0)
         if entry_price == 0:
-            return False
-        
+            continue
+
+        sell_type = trigger.sell_type
         if sell_type == SellOrderType.POINTS_STOP:
-            stop_price = entry_price - trigger["points"]
-            return current_price <= stop_price
-            
+            stop_price = entry_price - trigger.points
         elif sell_type == SellOrderType.PERCENTAGE_STOP:
-            stop_price = entry_price * (1 - trigger["percentage"] / 100)
-            return current_price <= stop_price
-            
-        elif sell_type == SellOrderType.CANDLE_STOP:
-            # Candle analysis logic would go here
-            return False  # Placeholder
-            
-    except Exception as e:
-        logger.error(f"Sell trigger check error: {e}")
-        return False
+            stop_price = entry_price * (1 - trigger.percentage / 100)
+        else:
+            # Candle stops have no static level (placeholder)
+            continue
+
+        trigger.target_price = stop_price
+        bot_state.trigger_arrays.set_target(trigger_id, stop_price)
 
-async def execute_trigger(trigger_id: str, trigger: dict):
+async def execute_trigger(trigger_id: str, trigger: Trigger):
     """Execute a triggered order"""
     try:
-        if trigger["type"] == "buy_trigger":
+        if trigger.type == "buy_trigger":
             await execute_market_order(
-                symbol=trigger["symbol"],
-                exchange=trigger["exchange"],
-                symbol_token=trigger["symbol_token"],
-                quantity=trigger["quantity"],
+                symbol=trigger.symbol,
+                exchange=trigger.exchange,
+                symbol_token=trigger.symbol_token,
+                quantity=trigger.quantity,
                 transaction_type="BUY"
             )
-        elif trigger["type"] == "sell_trigger":
+        elif trigger.type == "sell_trigger":
             await execute_market_order(
-                symbol=trigger["symbol"],
-                exchange=trigger["exchange"], 
-                symbol_token=trigger["symbol_token"],
+                symbol=trigger.symbol,
+                exchange=trigger.exchange, 
+                symbol_token=trigger.symbol_token,
                 quantity=0,  # Will be determined from positions
                 transaction_type="SELL"
             )
             
-        logger.info(f"Executed trigger {trigger_id} for {trigger['symbol']}")
+        logger.info(f"Executed trigger {trigger_id} for {trigger.symbol}")
         
     except Exception as e:
         logger.error(f"Execute trigger error: {e}")
 
 async def auto_exit_monitor():
     """Monitor for 3:25 PM auto exit"""
+    exit_seconds = Config.AUTO_EXIT_TIME.hour * 3600 + Config.AUTO_EXIT_TIME.minute * 60
     while True:
         try:
-            current_time = datetime.now().time()
-            
-            if current_time >= Config.AUTO_EXIT_TIME and bot_state.bot_active:
+            # localtime() avoids building datetime/time objects every check
+            now = time_module.localtime()
+            now_seconds = now.tm_hour * 3600 + now.tm_min * 60 + now.tm_sec
+
+            if now_seconds >= exit_seconds and bot_state.bot_active:
                 logger.info("Auto exit time reached - closing all positions")
                 
-                # Get all positions and close them
+                # Get all positions and close them concurrently - serialized
+                # exits mean slippage on every position after the first
                 positions = await get_positions()
-                for pos in positions.get("data", []):
-                    if int(pos["netqty"]) > 0:
-                        try:
-                            await execute_market_order(
-                                symbol=pos["tradingsymbol"],
-                                exchange=pos["exchange"],
-                                symbol_token=pos["symboltoken"],
-                                quantity=0,
-                                transaction_type="SELL"
-                            )
-                        except Exception as e:
-                            logger.error(f"Auto exit error for {pos['tradingsymbol']}: {e}")
+                open_positions = [
+                    pos for pos in positions.get("data", [])
+                    if int(pos["netqty"]) > 0
+                ]
+                results = await asyncio.gather(
+                    *(execute_market_order(
+                        symbol=pos["tradingsymbol"],
+                        exchange=pos["exchange"],
+                        symbol_token=pos["symboltoken"],
+                        quantity=0,
+                        transaction_type="SELL"
+                    ) for pos in open_positions),
+                    return_exceptions=True
+                )
+                for pos, result in zip(open_positions, results):
+                    if isinstance(result, Exception):
+                        logger.error(f"Auto exit error for {pos['tradingsymbol']}: {result}")
                 
                 # Stop the bot
                 bot_state.bot_active = False
                 bot_state.active_orders.clear()
+                bot_state.trigger_arrays.clear()
                 
                 # Wait until next day
                 await asyncio.sleep(300)  # Wait 5 minutes before checking again